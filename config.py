@@ -47,10 +47,10 @@ FLASK_PORT = int(os.environ.get("PORT", os.environ.get("FLASK_PORT", "5000")))
 # ========================
 
 # 10 scheduled daily ayah messages
-SCHEDULE_TIMES = [
+SCHEDULE_TIMES = (
     "06:00", "08:24", "10:48", "13:12", "15:36",
     "18:00", "19:30", "21:00", "22:30", "23:50",
-]
+)
 
 # ========================
 # 🌍 LANGUAGE SETTINGS
@@ -69,3 +69,6 @@ QURAN_API_BASE = "https://api.alquran.cloud/v1"
 # Each returns {metadata: {...}, hadiths: [{hadithnumber, text, grades, reference}]}
 HADITH_API_BASE = "https://cdn.jsdelivr.net/gh/fawazahmed0/hadith-api@1/editions/eng-bukhari"
 HADITH_SECTIONS = 100  # Sahih Bukhari has ~100 sections (books)
+# Download all sections in the background at startup so hadith requests
+# are served from memory (set HADITH_PREFETCH=0 to fetch lazily instead)
+HADITH_PREFETCH = os.environ.get("HADITH_PREFETCH", "1") == "1"
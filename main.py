@@ -15,16 +15,21 @@
 """
 
 import asyncio
+import functools
 import hashlib
 import html as _html
 import json
 import logging
 import os
 import random
+import signal
 import threading
 import time as _time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from deep_translator import GoogleTranslator
 from flask import Flask, jsonify, request as flask_request, send_from_directory
 from flask_cors import CORS
@@ -52,6 +57,7 @@ from config import (
     QURAN_API_BASE,
     HADITH_API_BASE,
     HADITH_SECTIONS,
+    HADITH_PREFETCH,
     DEFAULT_TRANSLATION,
     WEBAPP_URL,
     FLASK_HOST,
@@ -86,7 +92,7 @@ logging.getLogger("werkzeug").setLevel(logging.WARNING)
 # 🎨  СТРОКИ  ИНТЕРФЕЙСА  (только русский)
 # ═══════════════════════════════════════════
 
-_REFLECTIONS = [
+_REFLECTIONS = (
     "💭 Каждый аят — послание именно для вас в этот момент.",
     "💭 Коран — зеркало души. Что вы видите сегодня?",
     "💭 Истинное знание приходит через размышление.",
@@ -97,7 +103,7 @@ _REFLECTIONS = [
     "💭 В тишине размышления рождается понимание.",
     "💭 Аллах не обременяет душу сверх её возможностей.",
     "💭 Пусть сегодняшний аят станет проводником на весь день.",
-]
+)
 
 _WELCOME = (
     "﷽\n\n"
@@ -125,6 +131,28 @@ _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 _CACHE_FILE = os.path.join(_BASE_DIR, "translation_cache.json")
 _cache: dict = {}
 _cache_lock = threading.Lock()
+# Serialises saves: snapshot + write + rename as one step, so two savers
+# never share the .tmp file and an older snapshot can't replace a newer one
+_cache_save_lock = threading.Lock()
+_cache_unsaved = 0          # entries added since the last save
+_CACHE_SAVE_EVERY = 20
+_inflight: dict[str, threading.Event] = {}  # cache key → translation running
+
+# GoogleTranslator keeps request params on the instance, so instances are
+# reused per thread only; the semaphore caps parallel calls to Google.
+_translators = threading.local()
+_translate_slots = threading.BoundedSemaphore(4)
+
+
+def _get_translator(source_lang: str, target_lang: str) -> GoogleTranslator:
+    """Return this thread's translator for a language pair."""
+    cache = getattr(_translators, "by_pair", None)
+    if cache is None:
+        cache = _translators.by_pair = {}
+    key = (source_lang, target_lang)
+    if key not in cache:
+        cache[key] = GoogleTranslator(source=source_lang, target=target_lang)
+    return cache[key]
 
 
 def _load_cache():
@@ -139,12 +167,22 @@ def _load_cache():
 
 
 def _save_cache():
-    with _cache_lock:
-        try:
-            with open(_CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(_cache, f, ensure_ascii=False)
-        except Exception as e:
-            logger.error("Cache save error: %s", e)
+    global _cache_unsaved
+    try:
+        with _cache_save_lock:
+            with _cache_lock:
+                # json.dumps uses the C encoder and lands in one write();
+                # json.dump streams hundreds of small chunks instead.
+                payload = json.dumps(_cache, ensure_ascii=False)
+                _cache_unsaved = 0
+            # Write-then-rename so a crash mid-save never truncates the cache;
+            # lookups only need _cache_lock, so they don't wait on the disk
+            tmp = _CACHE_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, _CACHE_FILE)
+    except Exception as e:
+        logger.error("Cache save error: %s", e)
 
 
 def _cache_key(text: str, src: str, tgt: str) -> str:
@@ -152,6 +190,22 @@ def _cache_key(text: str, src: str, tgt: str) -> str:
     return h
 
 
+# Unicode blocks of target languages we can recognise without a detector
+_SCRIPT_RANGES = {"ru": ("\u0400", "\u04ff"), "ar": ("\u0600", "\u06ff")}
+
+
+def _needs_translation(text: str, target_lang: str) -> bool:
+    """False if the text has no letters or is already in the target script."""
+    letters = [c for c in text[:200] if c.isalpha()]
+    if not letters:
+        return False
+    block = _SCRIPT_RANGES.get(target_lang)
+    if block is None:
+        return True
+    lo, hi = block
+    return not all(lo <= c <= hi for c in letters)
+
+
 def translate_text(text: str, target_lang: str = "ru",
                    source_lang: str = "auto") -> str:
     """Translate with paragraph chunking, caching, and safe fallback."""
@@ -159,12 +213,36 @@ def translate_text(text: str, target_lang: str = "ru",
         return text
     if target_lang == source_lang and source_lang != "auto":
         return text
+    if not _needs_translation(text, target_lang):
+        return text
 
     ck = _cache_key(text, source_lang, target_lang)
     with _cache_lock:
         if ck in _cache:
             return _cache[ck]
+        pending = _inflight.get(ck)
+        if pending is None:
+            _inflight[ck] = threading.Event()
+
+    if pending is not None:
+        # Another thread is translating the same text — reuse its result
+        pending.wait(timeout=60)
+        with _cache_lock:
+            if ck in _cache:
+                return _cache[ck]
+        return _translate_uncached(text, target_lang, source_lang, ck)
+
+    try:
+        return _translate_uncached(text, target_lang, source_lang, ck)
+    finally:
+        with _cache_lock:
+            _inflight.pop(ck).set()
 
+
+def _translate_uncached(text: str, target_lang: str, source_lang: str,
+                        ck: str) -> str:
+    """Chunk, translate and cache text whose full key ck missed the cache."""
+    global _cache_unsaved
     MAX_CHUNK = 4500
     paragraphs = text.split("\n")
     chunks: list[str] = []
@@ -187,7 +265,7 @@ def translate_text(text: str, target_lang: str = "ru",
 
     translated_parts: list[str] = []
     try:
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
+        translator = _get_translator(source_lang, target_lang)
         for part in final:
             part = part.strip()
             if not part:
@@ -198,11 +276,13 @@ def translate_text(text: str, target_lang: str = "ru",
                 if pck in _cache:
                     translated_parts.append(_cache[pck])
                     continue
-            result = translator.translate(part)
+            with _translate_slots:
+                result = translator.translate(part)
             if result:
                 translated_parts.append(result)
                 with _cache_lock:
                     _cache[pck] = result
+                    _cache_unsaved += 1
             else:
                 translated_parts.append(part)
             _time.sleep(0.15)
@@ -213,24 +293,74 @@ def translate_text(text: str, target_lang: str = "ru",
     full_result = "\n".join(translated_parts)
     with _cache_lock:
         _cache[ck] = full_result
-    if len(_cache) % 20 == 0:
+        _cache_unsaved += 1
+        save_due = _cache_unsaved >= _CACHE_SAVE_EVERY
+    if save_due:
         _save_cache()
     return full_result
 
 
+# Independent texts (e.g. both tafsirs of an ayah) are translated side by
+# side; _translate_slots still caps the calls actually sent to Google.
+_translate_pool = ThreadPoolExecutor(max_workers=4,
+                                     thread_name_prefix="translate")
+
+
+def _translate_all(*jobs: tuple[str, str, str]) -> list[str]:
+    """Run translate_text(text, target, source) for each job concurrently."""
+    futures = [_translate_pool.submit(translate_text, *job) for job in jobs]
+    return [f.result() for f in futures]
+
+
 # ═══════════════════════════════════════════
 # 📡  QURAN  &  HADITH  API
 # ═══════════════════════════════════════════
 
+# One pooled session for alquran.cloud + jsDelivr: keep-alive connections
+# instead of a fresh TCP/TLS handshake on every request. Transient 429/5xx
+# answers are retried with short exponential backoff. Retry-After is
+# ignored: a long server-requested wait would stall a user's request (or
+# the prefetch thread holding a section lock) instead of failing fast
+# into the fallback.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    ),
+))
+# (connect, read) — fail fast on unreachable hosts, allow slow bodies
+_HTTP_TIMEOUT = (3.05, 10)
+
+# URL templates: only the numbers change between calls
+_AYAH_URL = (f"{QURAN_API_BASE}/ayah/{{}}:{{}}"
+             f"/editions/quran-unicode,{DEFAULT_TRANSLATION}")
+_SECTION_URL = f"{HADITH_API_BASE}/{{}}.json"
+
+# The Quran never changes: successful lookups are kept for the process
+# lifetime (at most 6236 entries). Failures aren't cached, so they retry.
+_ayahs: dict[tuple[int, int], dict] = {}
+_ayahs_lock = threading.Lock()
+
+
 def fetch_ayah(surah: int, ayah: int) -> dict | None:
     """Fetch Arabic text + Russian translation for a single ayah."""
+    key = (surah, ayah)
+    with _ayahs_lock:
+        if key in _ayahs:
+            return _ayahs[key]
     try:
-        url = (f"{QURAN_API_BASE}/ayah/{surah}:{ayah}"
-               f"/editions/quran-unicode,{DEFAULT_TRANSLATION}")
-        r = requests.get(url, timeout=10).json()
+        r = _http.get(_AYAH_URL.format(surah, ayah),
+                      timeout=_HTTP_TIMEOUT).json()
         if r.get("code") == 200:
             ar_data = r["data"][0]
-            return {
+            data = {
                 "arabic": ar_data["text"],
                 "translation": r["data"][1]["text"],
                 "surah_en": ar_data["surah"]["englishName"],
@@ -239,6 +369,9 @@ def fetch_ayah(surah: int, ayah: int) -> dict | None:
                 "ayah_num": ayah,
                 "total_ayahs": ar_data["surah"]["numberOfAyahs"],
             }
+            with _ayahs_lock:
+                _ayahs[key] = data
+            return data
     except Exception as e:
         logger.error("Quran API error: %s", e)
     return None
@@ -252,28 +385,66 @@ def fetch_random_ayah() -> dict | None:
     return fetch_ayah(s, a)
 
 
+# Bukhari sections never change — keep each one after its first download.
+_hadith_sections: dict[int, list] = {}
+_sections_lock = threading.Lock()
+_section_fetch_locks: dict[int, threading.Lock] = {}
+
+
+def _fetch_section(section: int) -> list:
+    """Return the hadith list of a Bukhari section, from memory if cached."""
+    with _sections_lock:
+        if section in _hadith_sections:
+            return _hadith_sections[section]
+        fetch_lock = _section_fetch_locks.setdefault(section, threading.Lock())
+
+    # Concurrent misses (prefetch thread + user request) download only once
+    with fetch_lock:
+        with _sections_lock:
+            if section in _hadith_sections:
+                return _hadith_sections[section]
+        r = _http.get(_SECTION_URL.format(section), timeout=_HTTP_TIMEOUT)
+        r.raise_for_status()
+        hadiths = r.json().get("hadiths", [])
+        if hadiths:
+            with _sections_lock:
+                _hadith_sections[section] = hadiths
+        return hadiths
+
+
+def _prefetch_hadith_sections():
+    """Download every Bukhari section once so later picks never hit the CDN."""
+    for section in range(1, HADITH_SECTIONS + 1):
+        try:
+            _fetch_section(section)
+        except Exception as e:
+            logger.warning("Hadith prefetch %d failed: %s", section, e)
+    logger.info("📿 Hadith sections cached: %d", len(_hadith_sections))
+
+
+def _hadith_at(hadiths: list, section: int, index: int) -> dict:
+    """Build the hadith dict used by formatters and keyboards."""
+    h = hadiths[index]
+    ref = h.get("reference", {})
+    book = ref.get("book", section) if isinstance(ref, dict) else section
+    return {
+        "text": h.get("text", ""),
+        "number": h.get("hadithnumber", "?"),
+        "book": book,
+        "section": section,
+        "index": index,
+        "total": len(hadiths),
+    }
+
+
 def fetch_random_hadith() -> dict:
     """Fetch a random hadith from Sahih Bukhari."""
     try:
         section = random.randint(1, HADITH_SECTIONS)
-        url = f"{HADITH_API_BASE}/{section}.json"
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        hadiths = data.get("hadiths", [])
+        hadiths = _fetch_section(section)
         if hadiths:
             idx = random.randint(0, len(hadiths) - 1)
-            h = hadiths[idx]
-            ref = h.get("reference", {})
-            book = ref.get("book", section) if isinstance(ref, dict) else section
-            return {
-                "text": h.get("text", ""),
-                "number": h.get("hadithnumber", "?"),
-                "book": book,
-                "section": section,
-                "index": idx,
-                "total": len(hadiths),
-            }
+            return _hadith_at(hadiths, section, idx)
     except Exception as e:
         logger.error("Hadith API error: %s", e)
     return {
@@ -290,25 +461,13 @@ def fetch_hadith_by_pos(section: int, index: int) -> dict:
     """Fetch a hadith by exact section and index position."""
     try:
         section = max(1, min(section, HADITH_SECTIONS))
-        url = f"{HADITH_API_BASE}/{section}.json"
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        hadiths = data.get("hadiths", [])
+        hadiths = _fetch_section(section)
         if not hadiths:
             return fetch_random_hadith()
-        index = max(0, min(index, len(hadiths) - 1))
-        h = hadiths[index]
-        ref = h.get("reference", {})
-        book = ref.get("book", section) if isinstance(ref, dict) else section
-        return {
-            "text": h.get("text", ""),
-            "number": h.get("hadithnumber", "?"),
-            "book": book,
-            "section": section,
-            "index": index,
-            "total": len(hadiths),
-        }
+        if index < 0:  # _hadith_keyboard sentinel: last hadith of section
+            index = len(hadiths) - 1
+        index = min(index, len(hadiths) - 1)
+        return _hadith_at(hadiths, section, index)
     except Exception as e:
         logger.error("Hadith API (pos) error: %s", e)
         return fetch_random_hadith()
@@ -322,8 +481,9 @@ def _webapp_url(surah: int, ayah: int) -> str:
     return f"{WEBAPP_URL}/webapp?surah={surah}&ayah={ayah}&lang=ru"
 
 
+@functools.lru_cache(maxsize=1024)
 def _ayah_keyboard(surah: int, ayah: int) -> InlineKeyboardMarkup:
-    """Inline keyboard for an ayah message."""
+    """Inline keyboard for an ayah message (memoized)."""
     ps, pa = get_prev_ayah(surah, ayah)
     ns, na = get_next_ayah(surah, ayah)
     return InlineKeyboardMarkup([
@@ -340,9 +500,10 @@ def _ayah_keyboard(surah: int, ayah: int) -> InlineKeyboardMarkup:
     ])
 
 
+@functools.lru_cache(maxsize=512)
 def _hadith_keyboard(section: int = 1, index: int = 0,
                      total: int = 1) -> InlineKeyboardMarkup:
-    """Inline keyboard for a hadith message with prev/next."""
+    """Inline keyboard for a hadith message with prev/next (memoized)."""
     prev_sec, prev_idx = section, index - 1
     if prev_idx < 0:
         prev_sec = section - 1 if section > 1 else HADITH_SECTIONS
@@ -361,106 +522,142 @@ def _hadith_keyboard(section: int = 1, index: int = 0,
     ])
 
 
+# Visible excerpt lengths. The source is cut to roughly this length
+# before translating, so Google isn't sent text that would be clipped away;
+# the Russian may come out shorter or longer than the original.
+_QURTUBI_EXCERPT = 600
+_QUSHAIRI_EXCERPT = 400
+_HADITH_EXCERPT = 1500
+_HADITH_SHORT_EXCERPT = 300
+
+
+def _cut_source(text: str, limit: int) -> tuple[str, bool]:
+    """Cut text to `limit` chars at a sentence or word end; True if cut."""
+    if len(text) <= limit:
+        return text, False
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("؟"), cut.rfind("。"))
+    if end > limit // 2:
+        return cut[:end + 1], True
+    space = cut.rfind(" ")
+    return (cut[:space] if space > 0 else cut), True
+
+
+def _clip(text: str, limit: int, cut: bool = False) -> str:
+    """Cut text to at most `limit` chars; end with "…" if shortened or `cut`."""
+    if len(text) > limit:
+        return text[:limit - 1] + "…"
+    return text.rstrip() + "…" if cut and text else text
+
+
+# Fixed message pieces, built once; sections are joined with a blank line
+_DIVIDER = "┈" * 27
+_BLESSING = "🤲 Да благословит вас Аллах знанием."
+_AYAH_HEAD = (
+    "┌───── ✦ КОРАН И ТАФСИР ✦ ─────┐\n\n"
+    "🕌  <b>{s_ar}</b>  ({s_en})\n"
+    "     Сура {su}, Аят {ay}\n\n"
+    f"{_DIVIDER}\n\n"
+    "📜  <b>Арабский текст:</b>\n"
+    "<i>{arabic}</i>\n\n"
+    "🇷🇺  <b>Перевод:</b>\n"
+    "{translation}"
+)
+
+
+def _ayah_head(data: dict) -> str:
+    """Header block shared by the full and compact ayah messages."""
+    su = data["surah_num"]
+    return _AYAH_HEAD.format(
+        s_ar=get_surah_name(su), s_en=data.get("surah_en", ""),
+        su=su, ay=data["ayah_num"],
+        arabic=data["arabic"], translation=data["translation"],
+    )
+
+
 def format_ayah_message(data: dict) -> str:
     """Format a full ayah message with tafsir excerpts."""
     su = data["surah_num"]
     ay = data["ayah_num"]
-    s_ar = get_surah_name(su)
-    s_en = data.get("surah_en", "")
 
     qurtubi = get_tafsir_for_ayah(su, ay, "qurtubi")
     qushairi = get_tafsir_for_ayah(su, ay, "qushairi")
-    q_ru = translate_text(qurtubi, "ru", "ar")
-    qs_ru = translate_text(qushairi, "ru", "en")
-
-    # Escape HTML-breaking chars so Telegram doesn't reject the message
-    q_ru = _html.escape(q_ru)
-    qs_ru = _html.escape(qs_ru)
-
-    if len(q_ru) > 600:
-        q_ru = q_ru[:597] + "…"
-    if len(qs_ru) > 400:
-        qs_ru = qs_ru[:397] + "…"
-
-    reflection = random.choice(_REFLECTIONS)
-
-    return (
-        f"┌───── ✦ КОРАН И ТАФСИР ✦ ─────┐\n\n"
-        f"🕌  <b>{s_ar}</b>  ({s_en})\n"
-        f"     Сура {su}, Аят {ay}\n\n"
-        f"┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
-        f"📜  <b>Арабский текст:</b>\n"
-        f"<i>{data['arabic']}</i>\n\n"
-        f"🇷🇺  <b>Перевод:</b>\n"
-        f"{data['translation']}\n\n"
-        f"┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
-        f"📚  <b>Тафсир аль-Куртуби:</b>\n"
-        f"<i>{q_ru}</i>\n\n"
-        f"📖  <b>Тафсир аль-Кушайри:</b>\n"
-        f"<i>{qs_ru}</i>\n\n"
-        f"┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
-        f"{reflection}\n\n"
-        f"👇 Полный текст тафсира — кнопка ниже\n"
-        f"🤲 Да благословит вас Аллах знанием."
+    qurtubi, q_cut = _cut_source(qurtubi, _QURTUBI_EXCERPT)
+    qushairi, qs_cut = _cut_source(qushairi, _QUSHAIRI_EXCERPT)
+    q_ru, qs_ru = _translate_all(
+        (qurtubi, "ru", "ar"),
+        (qushairi, "ru", "en"),
     )
 
+    # Clip before escaping so the cut can't split an "&amp;"-style entity
+    q_ru = _html.escape(_clip(q_ru, _QURTUBI_EXCERPT, q_cut))
+    qs_ru = _html.escape(_clip(qs_ru, _QUSHAIRI_EXCERPT, qs_cut))
+
+    return "\n\n".join((
+        _ayah_head(data),
+        _DIVIDER,
+        f"📚  <b>Тафсир аль-Куртуби:</b>\n<i>{q_ru}</i>",
+        f"📖  <b>Тафсир аль-Кушайри:</b>\n<i>{qs_ru}</i>",
+        _DIVIDER,
+        random.choice(_REFLECTIONS),
+        f"👇 Полный текст тафсира — кнопка ниже\n{_BLESSING}",
+    ))
+
 
 def format_hadith_message(h: dict) -> str:
     """Format a hadith message with Russian translation."""
-    text_ru = translate_text(h["text"], "ru", "en") if h["text"] else ""
-    text_ru = _html.escape(text_ru)
-    if len(text_ru) > 1500:
-        text_ru = text_ru[:1497] + "…"
-
-    return (
-        f"┌──── ✦ ХАДИС ДНЯ ✦ ────┐\n\n"
-        f"📿  <i>{text_ru}</i>\n\n"
-        f"┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
+    text, cut = _cut_source(h["text"], _HADITH_EXCERPT)
+    text_ru = translate_text(text, "ru", "en") if text else ""
+    text_ru = _html.escape(_clip(text_ru, _HADITH_EXCERPT, cut))
+
+    return "\n\n".join((
+        "┌──── ✦ ХАДИС ДНЯ ✦ ────┐",
+        f"📿  <i>{text_ru}</i>",
+        _DIVIDER,
         f"📖  <i>Сахих аль-Бухари</i>\n"
-        f"     Книга {h['book']}, Хадис {h['number']}\n\n"
-        f"🤲 Да благословит вас Аллах знанием."
-    )
+        f"     Книга {h['book']}, Хадис {h['number']}",
+        _BLESSING,
+    ))
 
 
 def format_ayah_compact(data: dict, hadith: dict | None = None) -> str:
     """Compact format for scheduled messages and navigation."""
-    su = data["surah_num"]
-    ay = data["ayah_num"]
-    s_ar = get_surah_name(su)
-    s_en = data.get("surah_en", "")
-    reflection = random.choice(_REFLECTIONS)
-
-    msg = (
-        f"┌───── ✦ КОРАН И ТАФСИР ✦ ─────┐\n\n"
-        f"🕌  <b>{s_ar}</b>  ({s_en})\n"
-        f"     Сура {su}, Аят {ay}\n\n"
-        f"┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
-        f"📜  <b>Арабский текст:</b>\n"
-        f"<i>{data['arabic']}</i>\n\n"
-        f"🇷🇺  <b>Перевод:</b>\n"
-        f"{data['translation']}\n"
-    )
+    parts = [_ayah_head(data)]
 
     if hadith:
-        h_ru = translate_text(hadith["text"], "ru", "en")
-        h_ru = _html.escape(h_ru)
-        if len(h_ru) > 300:
-            h_ru = h_ru[:297] + "…"
-        msg += (
-            f"\n┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
+        text, cut = _cut_source(hadith["text"], _HADITH_SHORT_EXCERPT)
+        h_ru = translate_text(text, "ru", "en")
+        h_ru = _html.escape(_clip(h_ru, _HADITH_SHORT_EXCERPT, cut))
+        parts += (
+            _DIVIDER,
             f"📿  <b>Хадис:</b>\n"
             f"<i>{h_ru}</i>\n"
             f"📖  <i>Сахих аль-Бухари — "
-            f"Книга {hadith['book']}, Хадис {hadith['number']}</i>"
+            f"Книга {hadith['book']}, Хадис {hadith['number']}</i>",
         )
 
-    msg += (
-        f"\n\n┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈┈\n\n"
-        f"{reflection}\n\n"
-        f"👇 Полный тафсир — кнопка ниже\n"
-        f"🤲 Да благословит вас Аллах знанием."
+    parts += (
+        _DIVIDER,
+        random.choice(_REFLECTIONS),
+        f"👇 Полный тафсир — кнопка ниже\n{_BLESSING}",
     )
-    return msg
+    return "\n\n".join(parts)
+
+
+def _bookmarks_view(bm: list) -> tuple[str, InlineKeyboardMarkup]:
+    """Bookmarks list text + open/delete buttons (shared by command & callback)."""
+    lines = ["🔖  <b>Ваши закладки:</b>\n\n"]
+    buttons = []
+    for i, ref in enumerate(bm, 1):
+        su, _, ay = ref.partition(":")
+        name = get_surah_name(int(su))
+        lines.append(f"  {i}.  {name}  —  <code>{ref}</code>\n")
+        buttons.append([
+            InlineKeyboardButton(f"📖 {name} {ref}", callback_data=f"load_{su}_{ay}"),
+            InlineKeyboardButton("🗑", callback_data=f"delbm_{su}_{ay}"),
+        ])
+    lines.append("\n📌 Нажмите, чтобы открыть аят:")
+    return "".join(lines), InlineKeyboardMarkup(buttons)
 
 
 # ── Безопасная отправка / редактирование ──
@@ -565,26 +762,7 @@ async def cmd_bookmarks(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(msg, parse_mode="HTML")
         return
 
-    msg = "��  <b>Ваши закладки:</b>\n\n"
-    buttons = []
-    for i, ref in enumerate(bm, 1):
-        su = int(ref.split(":")[0])
-        ay = int(ref.split(":")[1])
-        name = get_surah_name(su)
-        msg += f"  {i}.  {name}  —  <code>{ref}</code>\n"
-        buttons.append([
-            InlineKeyboardButton(
-                f"📖 {name} {ref}",
-                callback_data=f"load_{su}_{ay}",
-            ),
-            InlineKeyboardButton(
-                "🗑",
-                callback_data=f"delbm_{su}_{ay}",
-            ),
-        ])
-
-    msg += f"\n📌 Нажмите, чтобы открыть аят:"
-    kb = InlineKeyboardMarkup(buttons) if buttons else None
+    msg, kb = _bookmarks_view(bm)
     await update.message.reply_text(msg, parse_mode="HTML", reply_markup=kb)
 
 
@@ -611,27 +789,19 @@ async def handle_any_message(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 # 🔄  CALLBACK  HANDLERS
 # ═══════════════════════════════════════════
 
-async def handle_callback(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    d = query.data
+def _on_query(fn):
+    """Adapt a callback taking just the CallbackQuery to a PTB handler."""
+    async def handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+        await fn(update.callback_query)
+    return handler
 
-    if d == "noop":
-        await query.answer()
-        return
-    if d.startswith("nav_"):
-        await _cb_nav(query)
-    elif d.startswith("bm_"):
-        await _cb_bookmark(query)
-    elif d.startswith("delbm_"):
-        await _cb_delbookmark(query)
-    elif d.startswith("load_"):
-        await _cb_load_ayah(query)
-    elif d.startswith("hadith_nav_"):
-        await _cb_hadith_nav(query)
-    elif d == "more_hadith":
-        await _cb_more_hadith(query)
-    else:
-        await query.answer("❓")
+
+async def _cb_noop(query):
+    await query.answer()
+
+
+async def _cb_unknown(query):
+    await query.answer("❓")
 
 
 async def _cb_nav(query):
@@ -648,7 +818,7 @@ async def _cb_nav(query):
         await query.answer("❌ Ошибка загрузки")
         return
     user_data.mark_ayah_read(uid, su, ay)
-    msg = await asyncio.to_thread(format_ayah_compact, data)
+    msg = format_ayah_compact(data)  # no hadith → no translation, pure CPU
     kb = _ayah_keyboard(su, ay)
     await _safe_send(query, msg, keyboard=kb)
 
@@ -690,25 +860,9 @@ async def _cb_delbookmark(query):
                 parse_mode="HTML",
             )
         else:
-            msg = "🔖  <b>Ваши закладки:</b>\n\n"
-            buttons = []
-            for i, ref in enumerate(bm, 1):
-                s = int(ref.split(":")[0])
-                a = int(ref.split(":")[1])
-                name = get_surah_name(s)
-                msg += f"  {i}.  {name}  —  <code>{ref}</code>\n"
-                buttons.append([
-                    InlineKeyboardButton(
-                        f"📖 {name} {ref}",
-                        callback_data=f"load_{s}_{a}",
-                    ),
-                    InlineKeyboardButton("🗑", callback_data=f"delbm_{s}_{a}"),
-                ])
-            msg += "\n📌 Нажмите, чтобы открыть аят:"
+            msg, kb = _bookmarks_view(bm)
             await query.edit_message_text(
-                msg, parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(buttons),
-            )
+                msg, parse_mode="HTML", reply_markup=kb)
     else:
         await query.answer("❌ Не найдено")
 
@@ -727,7 +881,7 @@ async def _cb_load_ayah(query):
         await query.answer("❌ Ошибка загрузки")
         return
     user_data.mark_ayah_read(uid, su, ay)
-    msg = await asyncio.to_thread(format_ayah_compact, data)
+    msg = format_ayah_compact(data)  # no hadith → no translation, pure CPU
     kb = _ayah_keyboard(su, ay)
     await query.message.reply_text(
         msg, parse_mode="HTML", reply_markup=kb)
@@ -758,6 +912,18 @@ async def _cb_more_hadith(query):
     await _safe_send(query, msg, keyboard=kb)
 
 
+# callback_data pattern → handler; PTB routes each press straight to it
+_CALLBACKS = (
+    (r"^noop$", _cb_noop),
+    (r"^nav_", _cb_nav),
+    (r"^bm_", _cb_bookmark),
+    (r"^delbm_", _cb_delbookmark),
+    (r"^load_", _cb_load_ayah),
+    (r"^hadith_nav_", _cb_hadith_nav),
+    (r"^more_hadith$", _cb_more_hadith),
+)
+
+
 # ═══════════════════════════════════════════
 # ⏰  РАСПИСАНИЕ  (ежедневные аяты)
 # ═══════════════════════════════════════════
@@ -770,12 +936,15 @@ async def send_scheduled_message(app: Application):
     """Send a scheduled daily ayah + hadith to CHAT_ID."""
     try:
         logger.info("⏰ Scheduled message triggered")
-        data = await asyncio.to_thread(fetch_random_ayah)
+        # Independent lookups: wait for the slower one, not both in turn
+        data, hadith = await asyncio.gather(
+            asyncio.to_thread(fetch_random_ayah),
+            asyncio.to_thread(fetch_random_hadith),
+        )
         if not data:
             logger.error("Scheduled: fetch failed")
             return
         su, ay = data["surah_num"], data["ayah_num"]
-        hadith = await asyncio.to_thread(fetch_random_hadith)
         msg = await asyncio.to_thread(format_ayah_compact, data, hadith)
         kb = _ayah_keyboard(su, ay)
         await app.bot.send_message(
@@ -832,8 +1001,10 @@ def api_tafsir():
     raw_qurtubi = get_full_tafsir(surah, ayah, "qurtubi")
     raw_qushairi = get_full_tafsir(surah, ayah, "qushairi")
 
-    t_qurtubi = translate_text(raw_qurtubi, "ru", "ar")
-    t_qushairi = translate_text(raw_qushairi, "ru", "en")
+    t_qurtubi, t_qushairi = _translate_all(
+        (raw_qurtubi, "ru", "ar"),
+        (raw_qushairi, "ru", "en"),
+    )
 
     ps, pa = get_prev_ayah(surah, ayah)
     ns, na = get_next_ayah(surah, ayah)
@@ -877,6 +1048,14 @@ def _run_flask():
 # 🚀  ЗАПУСК
 # ═══════════════════════════════════════════
 
+# (command, handler, menu description) — also feeds set_my_commands
+_COMMANDS = (
+    ("random", cmd_random, "Случайный аят"),
+    ("hadith", cmd_hadith, "Хадис дня"),
+    ("bookmarks", cmd_bookmarks, "Мои закладки"),
+)
+
+
 async def main():
     global _scheduler, _bot_app
 
@@ -889,24 +1068,31 @@ async def main():
     flask_thread.start()
     logger.info("🌐 Flask → %s:%s", FLASK_HOST, FLASK_PORT)
 
+    if HADITH_PREFETCH:
+        threading.Thread(target=_prefetch_hadith_sections, daemon=True).start()
+
     app = Application.builder().token(BOT_TOKEN).build()
     _bot_app = app
 
-    # 3 main commands
-    app.add_handler(CommandHandler("random", cmd_random))
-    app.add_handler(CommandHandler("hadith", cmd_hadith))
-    app.add_handler(CommandHandler("bookmarks", cmd_bookmarks))
+    for name, fn, _ in _COMMANDS:
+        app.add_handler(CommandHandler(name, fn))
     # Legacy /start → same as /random
     app.add_handler(CommandHandler("start", cmd_random))
-    # Callbacks
-    app.add_handler(CallbackQueryHandler(handle_callback))
+    # Callbacks (anything unmatched gets a "❓")
+    for pattern, fn in _CALLBACKS:
+        app.add_handler(CallbackQueryHandler(_on_query(fn), pattern=pattern))
+    app.add_handler(CallbackQueryHandler(_on_query(_cb_unknown)))
     # Any other text → auto-welcome or hint
     app.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND, handle_any_message))
 
-    # APScheduler
+    # APScheduler — a late or overlapping tick fires once, never in a burst
     _scheduler = AsyncIOScheduler(
-        job_defaults={"misfire_grace_time": 120},
+        job_defaults={
+            "coalesce": True,
+            "max_instances": 1,
+            "misfire_grace_time": 120,
+        },
     )
     for t in SCHEDULE_TIMES:
         hh, mm = map(int, t.split(":"))
@@ -915,7 +1101,6 @@ async def main():
             hour=hh, minute=mm, args=[app],
             id=f"schedule_{hh:02d}{mm:02d}",
             replace_existing=True,
-            misfire_grace_time=120,
         )
 
     await app.initialize()
@@ -926,26 +1111,30 @@ async def main():
     jobs = _scheduler.get_jobs()
     logger.info("📅 Scheduler: %d jobs", len(jobs))
 
-    await app.bot.set_my_commands([
-        BotCommand("random", "Случайный аят"),
-        BotCommand("hadith", "Хадис дня"),
-        BotCommand("bookmarks", "Мои закладки"),
-    ])
-    logger.info("📋 Bot menu set (3 commands)")
+    await app.bot.set_my_commands(
+        [BotCommand(name, desc) for name, _, desc in _COMMANDS])
+    logger.info("📋 Bot menu set (%d commands)", len(_COMMANDS))
 
     await app.updater.start_polling()
     logger.info("✅ Bot running!  Ctrl+C to stop.")
 
-    try:
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("🛑 Shutting down…")
-        _save_cache()
-        _scheduler.shutdown()
-        await app.updater.stop()
-        await app.stop()
-        await app.shutdown()
+    # Sleep until SIGINT/SIGTERM instead of polling once a second
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C still raises below
+            pass
+    await stop.wait()
+
+    logger.info("🛑 Shutting down…")
+    _save_cache()
+    user_data.flush()
+    _scheduler.shutdown()
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
 
 
 if __name__ == "__main__":
@@ -953,4 +1142,5 @@ if __name__ == "__main__":
         asyncio.run(main())
     except KeyboardInterrupt:
         _save_cache()
+        user_data.flush()
         logger.info("👋 Stopped.")
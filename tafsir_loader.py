@@ -10,6 +10,7 @@ Reads tafsir from local JSON files:
 No external APIs are used for tafsir.
 """
 
+import functools
 import json
 import os
 from config import QURTUBI_PATH, QUSHAIRI_PATH, MAX_TAFSIR_LENGTH
@@ -101,9 +102,12 @@ def _truncate_text(text: str, max_length: int = None) -> str:
     return truncated + " (...)"
 
 
+# Tafsir files are static: keep recently used ayahs (the bot message and
+# the web app both read the same one) instead of re-parsing the JSON.
+@functools.lru_cache(maxsize=256)
 def _load_ayah_text(base_path: str, surah_num: int, ayah_num: int) -> str | None:
     """
-    Load raw tafsir text for a specific ayah (no truncation).
+    Load raw tafsir text for a specific ayah (no truncation, memoized).
 
     Lookup order:
       1. Per-ayah file: {base_path}/{surah}/{ayah}.json
@@ -129,7 +133,7 @@ def _load_ayah_text(base_path: str, surah_num: int, ayah_num: int) -> str | None
         try:
             with open(surah_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                for ayah in data.get("ayahs", []):
+                for ayah in data.get("ayahs") or []:
                     if ayah.get("ayah") == ayah_num:
                         text = ayah.get("text", "")
                         if text:
@@ -219,6 +223,35 @@ def get_both_tafsirs(surah_num: int, ayah_num: int, full: bool = False) -> dict:
 # 🔍 SEARCH
 # ========================
 
+@functools.lru_cache(maxsize=None)
+def _search_corpus(source: str) -> tuple:
+    """
+    All ayahs of a source as (surah, ayah, text, lowercased text) tuples.
+
+    Read from the surah-level files on the first search only; later
+    searches scan memory instead of re-parsing 114 JSON files.
+    """
+    base_path = _get_source_path(source)
+    corpus = []
+    for surah_num in range(1, 115):
+        surah_file = os.path.join(base_path, f"{surah_num}.json")
+        if not os.path.exists(surah_file):
+            continue
+        try:
+            with open(surah_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, KeyError):
+            continue
+        # Surahs with no tafsir store "ayahs": null
+        for ayah in data.get("ayahs") or []:
+            text = ayah.get("text") or ""
+            lower = text.lower()
+            # Arabic has no case: share the string instead of a copy
+            corpus.append((ayah.get("surah", surah_num), ayah.get("ayah"),
+                           text, text if lower == text else lower))
+    return tuple(corpus)
+
+
 def search_tafsir(keyword: str, source: str = "qushairi", max_results: int = 10) -> list:
     """
     Search tafsir texts for a keyword across all surahs.
@@ -231,43 +264,32 @@ def search_tafsir(keyword: str, source: str = "qushairi", max_results: int = 10)
     Returns:
         List of dicts: [{surah, ayah, snippet, surah_name}]
     """
-    base_path = _get_source_path(source)
+    _get_source_path(source)  # validate before the blank-keyword shortcut
     results = []
+    # A blank keyword matches every ayah — don't load the corpus for that
+    if not keyword or not keyword.strip():
+        return results
     keyword_lower = keyword.lower()
 
-    for surah_num in range(1, 115):
+    for surah, ayah, text, lower in _search_corpus(source):
         if len(results) >= max_results:
             break
-
-        surah_file = os.path.join(base_path, f"{surah_num}.json")
-        if not os.path.exists(surah_file):
-            continue
-
-        try:
-            with open(surah_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for ayah in data.get("ayahs", []):
-                    if len(results) >= max_results:
-                        break
-
-                    text = ayah.get("text", "")
-                    if keyword_lower in text.lower():
-                        idx = text.lower().find(keyword_lower)
-                        start = max(0, idx - 60)
-                        end = min(len(text), idx + len(keyword) + 60)
-                        snippet = (
-                            ("..." if start > 0 else "")
-                            + text[start:end]
-                            + ("..." if end < len(text) else "")
-                        )
-                        results.append({
-                            "surah": ayah.get("surah", surah_num),
-                            "ayah": ayah.get("ayah"),
-                            "snippet": snippet,
-                            "surah_name": SURAH_NAMES.get(surah_num, f"Surah {surah_num}"),
-                        })
-        except (json.JSONDecodeError, KeyError):
+        idx = lower.find(keyword_lower)
+        if idx == -1:
             continue
+        start = max(0, idx - 60)
+        end = min(len(text), idx + len(keyword) + 60)
+        snippet = (
+            ("..." if start > 0 else "")
+            + text[start:end]
+            + ("..." if end < len(text) else "")
+        )
+        results.append({
+            "surah": surah,
+            "ayah": ayah,
+            "snippet": snippet,
+            "surah_name": SURAH_NAMES.get(surah, f"Surah {surah}"),
+        })
 
     return results
 
@@ -8,30 +8,76 @@ Simplified: no reminders, no language prefs, no streaks.
 """
 
 import json
+import logging
 import os
+import threading
 
 DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_data.json")
 
+logger = logging.getLogger("bot")
+
+# Changes are written at most once per FLUSH_DELAY seconds
+FLUSH_DELAY = 1.0
+
+# In-memory copy of DATA_FILE; this process is its only writer
+_data: dict | None = None
+_lock = threading.RLock()
+_dirty = False
+_flush_timer: threading.Timer | None = None
+
 
 # ========================
 # 💾 PERSISTENCE
 # ========================
 
 def _load_data() -> dict:
-    """Load all user data from JSON file."""
-    if os.path.exists(DATA_FILE):
+    """Load all user data (read from the JSON file only on first use)."""
+    global _data
+    if _data is None:
+        _data = {}
+        if os.path.exists(DATA_FILE):
+            try:
+                with open(DATA_FILE, "r", encoding="utf-8") as f:
+                    _data = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+    return _data
+
+
+def _save_data():
+    """Mark user data as changed; flush() writes it shortly after."""
+    global _dirty, _flush_timer
+    with _lock:
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush():
+    """Write pending changes to the JSON file now (also called on shutdown)."""
+    global _dirty, _flush_timer
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _dirty:
+            return
+        payload = json.dumps(_load_data(), ensure_ascii=False, indent=2)
+        # Write-then-rename: a crash mid-write must never leave a truncated
+        # file that _load_data would read as "no users". Holding _lock for
+        # the whole step keeps concurrent flushes off the same .tmp file.
+        tmp = DATA_FILE + ".tmp"
         try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
-
-
-def _save_data(data: dict):
-    """Save user data to JSON file."""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, DATA_FILE)
+        except OSError as e:
+            # Stay dirty: the next change schedules another attempt
+            logger.error("User data save error: %s", e)
+            return
+        _dirty = False
 
 
 def _get_user(data: dict, user_id) -> dict:
@@ -51,20 +97,21 @@ def _get_user(data: dict, user_id) -> dict:
 
 def user_exists(user_id) -> bool:
     """Check if user already has a record."""
-    data = _load_data()
-    return str(user_id) in data
+    with _lock:
+        return str(user_id) in _load_data()
 
 
 def ensure_user(user_id):
     """Create user record if it doesn't exist."""
-    data = _load_data()
-    uid = str(user_id)
-    if uid not in data:
-        data[uid] = {
-            "bookmarks": [],
-            "read_ayahs": [],
-        }
-        _save_data(data)
+    with _lock:
+        data = _load_data()
+        uid = str(user_id)
+        if uid not in data:
+            data[uid] = {
+                "bookmarks": [],
+                "read_ayahs": [],
+            }
+            _save_data()
 
 
 # ========================
@@ -73,37 +120,40 @@ def ensure_user(user_id):
 
 def add_bookmark(user_id, surah: int, ayah: int) -> bool:
     """Add a bookmark. Returns False if already bookmarked."""
-    data = _load_data()
-    user = _get_user(data, user_id)
-    ref = f"{surah}:{ayah}"
+    with _lock:
+        data = _load_data()
+        user = _get_user(data, user_id)
+        ref = f"{surah}:{ayah}"
 
-    if ref in user["bookmarks"]:
-        return False
+        if ref in user["bookmarks"]:
+            return False
 
-    user["bookmarks"].append(ref)
-    _save_data(data)
-    return True
+        user["bookmarks"].append(ref)
+        _save_data()
+        return True
 
 
 def remove_bookmark(user_id, surah: int, ayah: int) -> bool:
     """Remove a bookmark. Returns False if not found."""
-    data = _load_data()
-    user = _get_user(data, user_id)
-    ref = f"{surah}:{ayah}"
+    with _lock:
+        data = _load_data()
+        user = _get_user(data, user_id)
+        ref = f"{surah}:{ayah}"
 
-    if ref not in user["bookmarks"]:
-        return False
+        if ref not in user["bookmarks"]:
+            return False
 
-    user["bookmarks"].remove(ref)
-    _save_data(data)
-    return True
+        user["bookmarks"].remove(ref)
+        _save_data()
+        return True
 
 
 def get_bookmarks(user_id) -> list:
-    """Get all bookmarks for a user."""
-    data = _load_data()
-    user = _get_user(data, user_id)
-    return user["bookmarks"]
+    """Get all bookmarks for a user (a copy, safe to modify)."""
+    with _lock:
+        data = _load_data()
+        user = _get_user(data, user_id)
+        return list(user["bookmarks"])
 
 
 # ========================
@@ -112,10 +162,11 @@ def get_bookmarks(user_id) -> list:
 
 def mark_ayah_read(user_id, surah: int, ayah: int):
     """Mark an ayah as read."""
-    data = _load_data()
-    user = _get_user(data, user_id)
-    ref = f"{surah}:{ayah}"
-
-    if ref not in user["read_ayahs"]:
-        user["read_ayahs"].append(ref)
-        _save_data(data)
+    with _lock:
+        data = _load_data()
+        user = _get_user(data, user_id)
+        ref = f"{surah}:{ayah}"
+
+        if ref not in user["read_ayahs"]:
+            user["read_ayahs"].append(ref)
+            _save_data()